@@ -322,8 +322,11 @@ function findBestCoalitions() {
         const size = c.length;
         sizeCount[size] = (sizeCount[size] || 0) + 1;
     });
-    console.log('Coalition size distribution:', sizeCount);
-    console.log('Total coalitions generated:', coalitions.length);
+    // Structured line so tooling (test_coalition_sizes.py) can json-parse it
+    console.log('COALITION_STATS:' + JSON.stringify({
+        size_distribution: sizeCount,
+        total: coalitions.length
+    }));
     
     // Score each coalition by agreement
     const scoredCoalitions = coalitions.map(coalition => {
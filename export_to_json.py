@@ -8,8 +8,8 @@ Usage:
 This will create statements_wide.json with the data in a structured format.
 """
 
-import json
-import pandas as pd
+import orjson
+import polars as pl
 from pathlib import Path
 
 
@@ -29,8 +29,8 @@ def export_statements_to_json(
             - "flat": Simple array of objects (like CSV rows)
     """
     # Load the CSV
-    df = pd.read_csv(csv_path)
-    
+    df = pl.read_csv(csv_path)
+
     if format_type == "structured":
         # Create structured format
         data = {
@@ -48,63 +48,79 @@ def export_statements_to_json(
             "parties": [col for col in df.columns if col not in ['statement_id', 'statement_text']],
             "statements": []
         }
-        
-        # Add each statement
-        for _, row in df.iterrows():
+
+        # Add each statement (iter_rows avoids per-row Series allocation)
+        for row in df.iter_rows(named=True):
             statement = {
                 "id": row['statement_id'],
                 "text": row['statement_text'],
                 "positions": {}
             }
-            
+
             # Add party positions
             for party in data["parties"]:
                 stance = row[party]
-                if pd.notna(stance):  # Check if not NaN
+                if stance is not None:  # Skip missing cells
                     statement["positions"][party] = int(stance)
-            
+
             data["statements"].append(statement)
-    
+
     else:  # flat format
         # Convert DataFrame to list of dictionaries
-        data = df.to_dict(orient='records')
-    
-    # Write to JSON file
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        data = df.to_dicts()
     
+    # Write to JSON file; orjson emits UTF-8 bytes directly, so write binary.
+    # The flat variant is machine-read only, so skip indentation there.
+    option = orjson.OPT_INDENT_2 if format_type == "structured" else 0
+    with open(json_path, 'wb') as f:
+        f.write(orjson.dumps(data, option=option))
+
     print(f"✓ Exported {len(df)} statements to {json_path}")
     print(f"  Format: {format_type}")
     print(f"  File size: {Path(json_path).stat().st_size / 1024:.1f} KB")
 
 
+def export_statements_to_parquet(
+    csv_path: str = "statements_wide.csv",
+    parquet_path: str = "statements_wide.parquet"
+) -> None:
+    """
+    Export statements_wide.csv to Parquet format.
+
+    Parquet stores the stance columns as dictionary-encoded int8, so the file
+    is a fraction of the CSV size and loads without a parse step.
+    load_kieswijzer_data prefers this file over the CSV when present.
+
+    Args:
+        csv_path: Path to input CSV file
+        parquet_path: Path to output Parquet file
+    """
+    df = pl.read_csv(csv_path)
+    stance_cols = [c for c in df.columns if c not in ('statement_id', 'statement_text')]
+    df = df.with_columns(pl.col(stance_cols).cast(pl.Int8))
+    df.write_parquet(parquet_path, compression='zstd')
+
+    print(f"✓ Exported {len(df)} statements to {parquet_path}")
+    print(f"  File size: {Path(parquet_path).stat().st_size / 1024:.1f} KB")
+
+
 def export_long_format_to_json(
     csv_path: str = "statements_long.csv",
-    json_path: str = "statements_long.json"
+    json_path: str = "statements_long.ndjson"
 ) -> None:
     """
-    Export statements_long.csv to JSON format.
-    
+    Export statements_long.csv to NDJSON format (one JSON object per line).
+
+    NDJSON lets the writer stream row by row instead of materializing every
+    row as a Python dict first, and lets consumers stream-read it back.
+
     Args:
         csv_path: Path to input CSV file
-        json_path: Path to output JSON file
+        json_path: Path to output NDJSON file
     """
-    df = pd.read_csv(csv_path)
-    
-    # Group by statement
-    data = {
-        "metadata": {
-            "source": "StemWijzer Tweede Kamerverkiezing 2025",
-            "url": "https://tweedekamer2025.stemwijzer.nl",
-            "total_records": len(df),
-            "format": "long (one row per statement-party combination)"
-        },
-        "data": df.to_dict(orient='records')
-    }
-    
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
+    df = pl.read_csv(csv_path)
+    df.write_ndjson(json_path)
+
     print(f"✓ Exported {len(df)} records to {json_path}")
     print(f"  File size: {Path(json_path).stat().st_size / 1024:.1f} KB")
 
@@ -129,11 +145,19 @@ if __name__ == "__main__":
     )
     
     print()
-    
+
+    # Export wide format (Parquet) - preferred by load_kieswijzer_data
+    export_statements_to_parquet(
+        csv_path="statements_wide.csv",
+        parquet_path="statements_wide.parquet"
+    )
+
+    print()
+
     # Export long format
     export_long_format_to_json(
         csv_path="statements_long.csv",
-        json_path="statements_long.json"
+        json_path="statements_long.ndjson"
     )
     
     print("\n✓ All exports complete!")
\ No newline at end of file
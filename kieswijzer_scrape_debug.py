@@ -1,7 +1,7 @@
 #!/usr/bin/env -S uv run -s
 # /// script
 # requires-python = ">=3.12"
-# dependencies = ["playwright>=1.47,<2"]
+# dependencies = ["playwright>=1.47,<2", "polars>=1.0"]
 # ///
 """
 kieswijzer_scrape_debug.py — resilient scraper + rich diagnostics (uv script)
@@ -12,10 +12,11 @@ Commands:
   pivot  --in CSV --out CSV
 """
 from __future__ import annotations
-import argparse, asyncio, csv, os, re, subprocess, sys, time, json, pathlib
+import argparse, asyncio, csv, io, os, re, subprocess, sys, time, json, pathlib
 from dataclasses import dataclass
 from typing import Optional, List, Tuple, Dict
 from collections import defaultdict, OrderedDict
+import polars as pl
 from playwright.async_api import async_playwright, TimeoutError as PWTimeout
 
 # ---------- selector presets (tune here once you see real markup) ----------
@@ -58,13 +59,17 @@ STANCE_TEXT_MAP = {
 }
 
 THROTTLE_MS = 600
+MAX_DEBUG_DUMPS = 3
+_dump_count = 0
 
 @dataclass
 class Statement: sid:str; text:str
 @dataclass
 class PartyStance: party:str; value:int
 
-def normalize(s:str)->str: return re.sub(r"\s+", " ", s or "").strip()
+# str.split() collapses whitespace runs and strips in one C loop -- same
+# semantics as re.sub(r"\s+", " ", s).strip() but without the regex engine
+def normalize(s:str)->str: return " ".join((s or "").split())
 
 async def snap(page, shots_dir:Optional[str], name:str):
   if not shots_dir: return
@@ -121,41 +126,34 @@ async def deep_query_all(page, root_selector:str, inner_selector:str):
   return await page.evaluate_handle(js, root_selector, inner_selector)
 
 async def extract_party_stances(page, S)->List[PartyStance]:
-  """Extract party stances from column-based layout (StemWijzer style)"""
-  stances: List[PartyStance] = []
-  
-  # Find all party columns (Eens, Geen van beide, Oneens)
-  columns = await page.query_selector_all(".parties-column")
-  
-  for column in columns:
-    # Determine stance value from column header class
-    header = await column.query_selector(".parties-column__header")
-    if not header:
-      continue
-    
-    # Check the header's class to determine stance
-    header_class = await header.get_attribute("class")
-    stance_value = None
-    
-    if "parties-column__header--agree" in (header_class or ""):
-      stance_value = 1
-    elif "parties-column__header--disagree" in (header_class or ""):
-      stance_value = -1
-    elif "parties-column__header--neither" in (header_class or ""):
-      stance_value = 0
-    
-    if stance_value is None:
-      continue
-    
-    # Get all parties in this column
-    party_items = await column.query_selector_all(".parties-column__party")
-    for item in party_items:
-      name_el = await item.query_selector(".parties-column__party-name")
-      if name_el:
-        party_name = normalize(await name_el.inner_text())
-        stances.append(PartyStance(party_name, stance_value))
-  
-  return stances
+  """Extract party stances from column-based layout (StemWijzer style).
+
+  Walks all columns (Eens, Geen van beide, Oneens) in a single page.evaluate
+  so extraction costs one CDP roundtrip instead of one per column/party.
+  """
+  js = r"""
+  () => {
+    const cls = {
+      'parties-column__header--agree': 1,
+      'parties-column__header--neither': 0,
+      'parties-column__header--disagree': -1,
+    };
+    const out = [];
+    document.querySelectorAll('.parties-column').forEach(col => {
+      const h = col.querySelector('.parties-column__header');
+      if (!h) return;
+      let v = null;
+      for (const k in cls) if (h.classList.contains(k)) { v = cls[k]; break; }
+      if (v === null) return;
+      col.querySelectorAll('.parties-column__party-name').forEach(n => {
+        out.push([n.innerText, v]);
+      });
+    });
+    return out;
+  }
+  """
+  pairs = await page.evaluate(js)
+  return [PartyStance(normalize(name), value) for name, value in pairs]
 
 async def harvest_single_statement(page, S, shots, sid:str)->Tuple[Statement, List[PartyStance]]:
   """Extract one statement from current page (wizard-style interface)"""
@@ -178,10 +176,11 @@ async def harvest_single_statement(page, S, shots, sid:str)->Tuple[Statement, Li
     if btn:
       await btn.click()
       opened = True
-      # Wait for the tab content to be visible
-      await page.wait_for_timeout(THROTTLE_MS)
-      # Wait for the parties tab to be fully loaded
+      # Wait until the party columns are actually populated instead of
+      # sleeping a fixed interval
       await page.wait_for_selector(".statement__tab--parties", state="visible", timeout=3000)
+      await page.wait_for_function(
+        "document.querySelectorAll('.parties-column__party').length > 0", timeout=3000)
       print(f"  Opened party positions for {sid}")
   except Exception as e:
     print(f"  Could not open party positions: {e}")
@@ -190,127 +189,218 @@ async def harvest_single_statement(page, S, shots, sid:str)->Tuple[Statement, Li
 
   stances = []
   if opened:
-    # Wait a bit more for content to render
-    await page.wait_for_timeout(500)
-    
-    # Always dump the full page HTML when modal is open for debugging
-    try:
-      html = await page.content()
-      pathlib.Path(f"party_modal_{sid}.html").write_text(html, encoding="utf-8")
-      print(f"  Saved party_modal_{sid}.html for inspection")
-    except Exception as e:
-      print(f"  Could not save modal HTML: {e}")
-    
     stances = await extract_party_stances(page, S)
     print(f"  Found {len(stances)} party stances")
-    
+
     if not stances:
-      # Debug: check if columns exist
-      columns = await page.query_selector_all(".parties-column")
-      print(f"  DEBUG: Found {len(columns)} party columns")
-      for i, col in enumerate(columns):
-        header = await col.query_selector(".parties-column__header")
-        parties = await col.query_selector_all(".parties-column__party")
-        print(f"    Column {i}: header={header is not None}, parties={len(parties)}")
+      # Dump the page HTML for inspection, but only on failure and at most
+      # MAX_DEBUG_DUMPS times per run -- page.content() serializes the whole
+      # DOM over CDP and the dumps can be MBs each
+      global _dump_count
+      if _dump_count < MAX_DEBUG_DUMPS:
+        _dump_count += 1
+        try:
+          html = await page.content()
+          pathlib.Path(f"party_modal_{sid}.html").write_text(html, encoding="utf-8")
+          print(f"  Saved party_modal_{sid}.html for inspection")
+        except Exception as e:
+          print(f"  Could not save modal HTML: {e}")
+      # Debug: check if columns exist -- evaluate_all inspects every column in
+      # one roundtrip instead of two awaits per column
+      columns_info = await page.locator(".parties-column").evaluate_all(
+        "els => els.map(e => ({hdr: !!e.querySelector('.parties-column__header'), parties: e.querySelectorAll('.parties-column__party').length}))")
+      print(f"  DEBUG: Found {len(columns_info)} party columns")
+      for i, info in enumerate(columns_info):
+        print(f"    Column {i}: header={info['hdr']}, parties={info['parties']}")
     
-    # Close the modal
+    # Close the modal and wait for it to actually go away
     await click_if_exists(page, S["close_party_positions_button"])
-    await page.wait_for_timeout(300)
+    try:
+      await page.wait_for_selector(".statement__tab--parties", state="hidden", timeout=2000)
+    except PWTimeout:
+      pass
 
   return (Statement(sid, s_text), stances)
 
-async def do_scrape(base_url:str, profile:str, out_csv:str, headed:bool, slowmo:int, trace:bool, shots:Optional[str], paginate:bool, max_pages:int):
+async def answer_statement(page)->bool:
+  """Click any answer button ("Eens" first) to advance the wizard."""
+  for sel in ("button.button--agree", "button.button--neither", "button.button--disagree"):
+    if await click_if_exists(page, sel): return True
+  return False
+
+async def wait_statement_change(page, S, prev_text:str):
+  """Wake as soon as the statement text differs from prev_text."""
+  if not prev_text: return
+  try:
+    await page.wait_for_function(
+      "([sel, prev]) => { const e = document.querySelector(sel); return e && e.innerText.trim() !== prev; }",
+      arg=[S["statement_text"], prev_text], timeout=3000)
+  except PWTimeout:
+    pass  # results page or unchanged text; the seen-set handles repeats
+
+async def harvest_range(context, S, base_url:str, shots:Optional[str], start_idx:int, end_idx:int)->List[Tuple[Statement, List[PartyStance]]]:
+  """Walk the wizard in one browser context, harvesting statements start_idx..end_idx.
+
+  Statements before start_idx are answered without opening the party panel,
+  so several contexts can cover disjoint ranges of the quiz in parallel.
+  """
+  tag = f"[t{start_idx:02d}-t{end_idx:02d}]"
+  page = await context.new_page()
+
+  # help diagnose console errors
+  page.on("console", lambda msg: print("BROWSER:", msg.type(), msg.text()))
+  page.on("pageerror", lambda err: print("BROWSER ERROR:", err))
+
+  await page.goto(base_url, wait_until="domcontentloaded")
+  await ensure_cookies(page, S)
+  await page.wait_for_load_state("networkidle")
+  await snap(page, shots, f"landing_{start_idx}")
+
+  # Click the Start button to enter the quiz
+  print(f"{tag} Looking for Start button...")
+  start_clicked = await click_if_exists(page, S["start_button"])
+  if start_clicked:
+    print(f"{tag} Start button clicked, waiting for statements to load...")
+    await page.wait_for_load_state("networkidle")
+    await page.wait_for_timeout(1000)  # Extra wait for SPA to render
+    await snap(page, shots, f"after_start_{start_idx}")
+  else:
+    print(f"{tag} WARN: Start button not found, proceeding anyway...")
+
+  harvested = []
+  # This is a wizard-style interface - one statement per page
+  # We need to iterate through statements using answer buttons
+  seen = set()
+  for idx in range(1, end_idx + 1):
+    sid = f"t{idx:02d}"
+
+    if idx < start_idx:
+      # Fast-forward: answer without opening the party panel
+      text_el = await page.query_selector(S["statement_text"])
+      prev = normalize(await text_el.inner_text()) if text_el else ""
+      if not await answer_statement(page):
+        print(f"{tag} Could not fast-forward past statement {sid}")
+        await page.close()
+        return harvested
+      await wait_statement_change(page, S, prev)
+      continue
+
+    st, stances = await harvest_single_statement(page, S, shots, sid)
+
+    if st.text and st.text not in seen:
+      seen.add(st.text)
+      harvested.append((st, stances))
+    elif not st.text:
+      print(f"No more statements found at index {idx}")
+      break
+
+    # Click any answer button to proceed to next statement
+    moved = await answer_statement(page)
+    await snap(page, shots, f"after_answer_{sid}")
+
+    if not moved:
+      print(f"Could not proceed after statement {sid}")
+      break
+
+    await wait_statement_change(page, S, st.text)
+
+    # Check if we've reached the end (results page or similar)
+    if idx >= 30:  # StemWijzer typically has 30 statements
+      break
+
+  await page.close()
+  return harvested
+
+async def do_scrape(base_url:str, profile:str, out_csv:str, headed:bool, slowmo:int, trace:bool, shots:Optional[str], paginate:bool, max_pages:int, wide_out:Optional[str]=None, workers:int=1):
   S = PROFILES[profile]
   async with async_playwright() as p:
     launch_args = dict(headless=not headed, slow_mo=slowmo or 0)
     browser = await p.chromium.launch(**launch_args)
-    context = await browser.new_context(locale="nl-NL", user_agent="Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/122 Safari/537.36")
-    if trace: await context.tracing.start(screenshots=True, snapshots=True, sources=True)
-    page = await context.new_page()
 
-    # help diagnose console errors
-    page.on("console", lambda msg: print("BROWSER:", msg.type(), msg.text()))
-    page.on("pageerror", lambda err: print("BROWSER ERROR:", err))
+    async def new_context():
+      context = await browser.new_context(locale="nl-NL", user_agent="Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/122 Safari/537.36")
 
-    await page.goto(base_url, wait_until="domcontentloaded")
-    await ensure_cookies(page, S)
-    await page.wait_for_load_state("networkidle")
-    await snap(page, shots, "landing")
-
-    # Click the Start button to enter the quiz
-    print("Looking for Start button...")
-    start_clicked = await click_if_exists(page, S["start_button"])
-    if start_clicked:
-      print("Start button clicked, waiting for statements to load...")
-      await page.wait_for_load_state("networkidle")
-      await page.wait_for_timeout(1000)  # Extra wait for SPA to render
-      await snap(page, shots, "after_start")
-    else:
-      print("WARN: Start button not found, proceeding anyway...")
-
-    harvested = []
-    # This is a wizard-style interface - one statement per page
-    # We need to iterate through statements using answer buttons
-    seen = set()
-    for idx in range(1, max_pages + 1):
-      sid = f"t{idx:02d}"
-      st, stances = await harvest_single_statement(page, S, shots, sid)
-      
-      if st.text and st.text not in seen:
-        seen.add(st.text)
-        harvested.append((st, stances))
-      elif not st.text:
-        print(f"No more statements found at index {idx}")
-        break
-      
-      # Click any answer button to proceed to next statement
-      # Try "Eens" (agree) button as default
-      moved = await click_if_exists(page, "button.button--agree")
-      if not moved:
-        # Try other buttons if agree doesn't work
-        moved = await click_if_exists(page, "button.button--neither")
-      if not moved:
-        moved = await click_if_exists(page, "button.button--disagree")
-      
-      await snap(page, shots, f"after_answer_{sid}")
-      
-      if not moved:
-        print(f"Could not proceed after statement {sid}")
-        break
-      
-      await page.wait_for_timeout(THROTTLE_MS)
-      
-      # Check if we've reached the end (results page or similar)
-      if idx >= 30:  # StemWijzer typically has 30 statements
-        break
-
-    with open(out_csv, "w", newline="", encoding="utf-8") as f:
-      w = csv.writer(f); w.writerow(["statement_id","statement_text","party","stance_value"])
-      for st, stances in harvested:
-        if stances:
-          for ps in stances: w.writerow([st.sid, st.text, ps.party, ps.value])
+      # We only scrape text and class names, so skip bytes that exist purely
+      # for rendering -- fewer requests also means networkidle fires sooner
+      async def _block_assets(route):
+        if route.request.resource_type in {"image","font","media","stylesheet"}:
+          await route.abort()
         else:
-          w.writerow([st.sid, st.text, "", ""])
+          await route.continue_()
+      await context.route("**/*", _block_assets)
+      return context
+
+    workers = max(1, min(workers, max_pages))
+    contexts = [await new_context() for _ in range(workers)]
+    if trace: await contexts[0].tracing.start(screenshots=True, snapshots=True, sources=True)
+
+    # Split the quiz into contiguous ranges; each context fast-forwards to its
+    # start by answering, then harvests only its own slice. Assumes the quiz
+    # is deterministic with respect to the answer path.
+    step = -(-max_pages // workers)
+    ranges = [(lo, min(lo + step - 1, max_pages)) for lo in range(1, max_pages + 1, step)]
+    results = await asyncio.gather(*[
+      harvest_range(ctx, S, base_url, shots, lo, hi)
+      for ctx, (lo, hi) in zip(contexts, ranges)])
+    harvested = [item for chunk in results for item in chunk]
+
+    # Build all rows up front and emit them with one writerows call through a
+    # 1 MiB buffer, instead of a Python-level writerow per party per statement
+    rows=[]
+    for st, stances in harvested:
+      if stances:
+        rows.extend([st.sid, st.text, ps.party, ps.value] for ps in stances)
+      else:
+        rows.append([st.sid, st.text, "", ""])
+    with open(out_csv, "w", newline="", encoding="utf-8", buffering=1<<20) as f:
+      w = csv.writer(f); w.writerow(["statement_id","statement_text","party","stance_value"])
+      w.writerows(rows)
+
+    # With --wide-out, shape the wide outputs from the in-memory data as well:
+    # skips the separate pivot + export_to_json passes (each a full CSV
+    # re-parse) for end-to-end runs
+    if wide_out and any(stances for _, stances in harvested):
+      df_long = pl.DataFrame(
+        [(st.sid, st.text, ps.party, ps.value) for st, stances in harvested for ps in stances],
+        schema=["statement_id","statement_text","party","stance_value"], orient="row")
+      wide = (df_long
+              .pivot(on="party", index=["statement_id","statement_text"], values="stance_value")
+              .sort("statement_id"))
+      base = pathlib.Path(wide_out)
+      wide.write_csv(base)
+      wide.write_parquet(base.with_suffix(".parquet"))
+      wide.write_json(base.with_suffix(".json"))
+      print(f"Wrote {base}, {base.with_suffix('.parquet')} and {base.with_suffix('.json')}")
 
     if trace:
-      await context.tracing.stop(path="trace.zip")
+      await contexts[0].tracing.stop(path="trace.zip")
       print("Trace written to trace.zip")
 
-    await context.close(); await browser.close()
+    for context in contexts: await context.close()
+    await browser.close()
     print(f"Wrote {out_csv} with {len(harvested)} statements.")
 
 def pivot(in_path:str, out_path:str):
   rows=[]; parties=OrderedDict()
-  with open(in_path, newline="", encoding="utf-8") as f:
-    r=csv.DictReader(f)
-    for row in r:
-      sid=(row.get("statement_id") or "").strip()
-      txt=(row.get("statement_text") or "").strip()
-      p=(row.get("party") or "").strip()
-      v=(row.get("stance_value") or "").strip()
-      if not sid: continue
-      rows.append((sid,txt,p,v))
-      if p: parties.setdefault(p,None)
+  # One bulk read + one decode, then parse from memory: no per-line buffered
+  # IO or incremental UTF-8 decoding inside the row loop
+  data = pathlib.Path(in_path).read_bytes().decode("utf-8", "replace")
+  # csv.reader + positional indexing: DictReader builds a dict per row,
+  # which is measurable overhead on statements x parties x runs
+  r=csv.reader(io.StringIO(data, newline=""))
+  header=next(r, [])
+  col={h:i for i,h in enumerate(header)}
+  i_sid=col.get("statement_id"); i_txt=col.get("statement_text")
+  i_party=col.get("party"); i_val=col.get("stance_value")
+  for row in r:
+    if i_sid is None or i_sid>=len(row): continue
+    sid=row[i_sid].strip()
+    txt=row[i_txt].strip() if i_txt is not None and i_txt<len(row) else ""
+    p=row[i_party].strip() if i_party is not None and i_party<len(row) else ""
+    v=row[i_val].strip() if i_val is not None and i_val<len(row) else ""
+    if not sid: continue
+    rows.append((sid,txt,p,v))
+    if p: parties.setdefault(p,None)
   by=defaultdict(lambda:{"text":"","vals":{}})
   for sid,txt,p,v in rows:
     if by[sid]["text"]=="": by[sid]["text"]=txt
@@ -340,6 +430,8 @@ def build_parser():
   sp.add_argument("--shots", default=None, help="Directory to save screenshots")
   sp.add_argument("--paginate", action="store_true")
   sp.add_argument("--max-pages", type=int, default=40)
+  sp.add_argument("--wide-out", default=None, help="Also write wide-format CSV/Parquet/JSON directly (skips pivot + export_to_json)")
+  sp.add_argument("--workers", type=int, default=1, help="Browser contexts walking disjoint statement ranges in parallel")
 
   pp=sub.add_parser("pivot")
   pp.add_argument("--in", dest="in_path", required=True)
@@ -350,7 +442,7 @@ def main():
   ap=build_parser(); args=ap.parse_args()
   if args.install_browser: install_browser(); return
   if args.cmd=="scrape":
-    asyncio.run(do_scrape(args.base_url, args.profile, args.out, args.headed, args.slowmo, args.trace, args.shots, args.paginate, args.max_pages)); return
+    asyncio.run(do_scrape(args.base_url, args.profile, args.out, args.headed, args.slowmo, args.trace, args.shots, args.paginate, args.max_pages, args.wide_out, args.workers)); return
   if args.cmd=="pivot": pivot(args.in_path, args.out_path); return
   ap.print_help()
 
@@ -12,51 +12,108 @@ Usage:
     df_long = load_statements_long()
 """
 
+import functools
+
+import numpy as np
 import pandas as pd
+import polars as pl
 from pathlib import Path
 
+# Sentinel for missing stances: stance columns are stored as int8 (stances are
+# only -1/0/1, so float64 wastes 8x the memory bandwidth) and int8 has no NaN.
+STANCE_NA = 127
+
+# Human-readable labels indexed by stance + 1
+_STANCE_CATEGORIES = ['Disagree', 'Neutral', 'Agree']
+
+
+@functools.lru_cache(maxsize=8)
+def _load_wide(filepath: str, mtime_ns: int) -> pd.DataFrame:
+    """Cached worker for load_statements_wide; mtime_ns invalidates on edits."""
+    path = Path(filepath)
+    if path.suffix == '.parquet':
+        raw = pl.read_parquet(path)
+        parties = [col for col in raw.columns if col not in ('statement_id', 'statement_text')]
+    else:
+        # Read the header once so the CSV reader gets an explicit int8 schema
+        # for the stance columns instead of running type inference per column
+        with open(filepath, encoding='utf-8') as f:
+            header = f.readline().rstrip('\n').split(',')
+        parties = [col for col in header if col not in ('statement_id', 'statement_text')]
+        raw = pl.read_csv(filepath, schema_overrides={p: pl.Int8 for p in parties})
+
+    df = (
+        raw
+        .with_columns(pl.col(parties).fill_null(STANCE_NA))
+        .to_pandas()
+    )
+
+    # Set statement_id as index for easier lookup
+    df = df.set_index('statement_id')
+
+    # Cache the party column names and positions once so lookups like
+    # get_statement_positions can use positional indexing instead of
+    # re-deriving the column list per call
+    df.attrs['party_cols'] = parties
+    df.attrs['party_iloc'] = np.array([df.columns.get_loc(p) for p in parties])
+
+    return df
+
 
 def load_statements_wide(filepath: str = "statements_wide.csv") -> pd.DataFrame:
     """
     Load the wide-format CSV into a pandas DataFrame.
-    
+
     Returns a DataFrame with:
     - Index: statement_id
     - Columns: statement_text, party names
-    - Values: stance (-1, 0, 1)
-    
+    - Values: stance (-1, 0, 1) as int8; missing stances are STANCE_NA
+
+    If a Parquet export with the same stem exists (statements_wide.parquet,
+    written by export_to_json.py), it is preferred over the CSV: it is
+    already typed and loads without a parse step.
+
+    Repeated calls for an unchanged file return a cached DataFrame, so the
+    result should be treated as read-only; call .copy() before mutating.
+
     Args:
         filepath: Path to the wide-format CSV file
-        
+
     Returns:
         DataFrame with statements as rows and parties as columns
     """
-    df = pd.read_csv(filepath)
-    
-    # Set statement_id as index for easier lookup
-    df = df.set_index('statement_id')
-    
-    return df
+    source = Path(filepath).with_suffix('.parquet')
+    if not source.exists():
+        source = Path(filepath)
+    return _load_wide(str(source), source.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_long(filepath: str, mtime_ns: int) -> pd.DataFrame:
+    """Cached worker for load_statements_long; mtime_ns invalidates on edits."""
+    return pd.read_csv(filepath)
 
 
 def load_statements_long(filepath: str = "statements_long.csv") -> pd.DataFrame:
     """
     Load the long-format CSV into a pandas DataFrame.
-    
+
     Returns a DataFrame with columns:
     - statement_id: Statement identifier (t01, t02, ...)
     - statement_text: Full text of the statement
     - party: Party name
     - stance_value: Party's stance (-1, 0, 1)
-    
+
+    Repeated calls for an unchanged file return a cached DataFrame, so the
+    result should be treated as read-only; call .copy() before mutating.
+
     Args:
         filepath: Path to the long-format CSV file
-        
+
     Returns:
         DataFrame in long format (one row per statement-party combination)
     """
-    df = pd.read_csv(filepath)
-    return df
+    return _load_long(filepath, Path(filepath).stat().st_mtime_ns)
 
 
 def get_party_agreement(df_wide: pd.DataFrame, party1: str, party2: str) -> dict:
@@ -78,17 +135,18 @@ def get_party_agreement(df_wide: pd.DataFrame, party1: str, party2: str) -> dict
     if party1 not in df_wide.columns or party2 not in df_wide.columns:
         raise ValueError(f"One or both parties not found in data")
     
-    p1_stances = df_wide[party1]
-    p2_stances = df_wide[party2]
-    
+    a = df_wide[party1].to_numpy()
+    b = df_wide[party2].to_numpy()
+    valid = (a != STANCE_NA) & (b != STANCE_NA)
+
     # Count agreements (same stance)
-    agreements = (p1_stances == p2_stances).sum()
-    
-    # Count disagreements (opposite stances: 1 vs -1 or -1 vs 1)
-    disagreements = ((p1_stances == 1) & (p2_stances == -1)).sum() + \
-                   ((p1_stances == -1) & (p2_stances == 1)).sum()
-    
-    total = len(p1_stances)
+    agreements = int(np.count_nonzero((a == b) & valid))
+
+    # Count disagreements (opposite stances: 1 vs -1 or -1 vs 1, i.e. sum 0
+    # with at least one non-neutral side)
+    disagreements = int(np.count_nonzero((a + b == 0) & (a != 0) & valid))
+
+    total = len(a)
     agreement_rate = (agreements / total * 100) if total > 0 else 0
     
     return {
@@ -112,15 +170,20 @@ def get_party_positions(df_wide: pd.DataFrame, party: str) -> pd.DataFrame:
     """
     if party not in df_wide.columns:
         raise ValueError(f"Party '{party}' not found in data")
-    
-    result = df_wide[['statement_text', party]].copy()
-    result.columns = ['statement', 'stance']
-    
-    # Add human-readable stance labels
-    stance_labels = {1: 'Agree', 0: 'Neutral', -1: 'Disagree'}
-    result['stance_label'] = result['stance'].map(stance_labels)
-    
-    return result
+
+    # Stance + 1 indexes straight into the category list, so the labels are a
+    # categorical built from the int8 codes -- no per-value dict lookup and
+    # 1 byte per row. STANCE_NA falls outside the range and becomes code -1
+    # (missing), matching the old NaN behaviour.
+    codes = df_wide[party].to_numpy().astype(np.int8) + 1
+    codes[(codes < 0) | (codes > 2)] = -1
+    labels = pd.Categorical.from_codes(codes, categories=_STANCE_CATEGORIES)
+
+    return pd.DataFrame({
+        'statement': df_wide['statement_text'],
+        'stance': df_wide[party],
+        'stance_label': labels,
+    })
 
 
 def get_statement_positions(df_wide: pd.DataFrame, statement_id: str) -> pd.Series:
@@ -136,10 +199,15 @@ def get_statement_positions(df_wide: pd.DataFrame, statement_id: str) -> pd.Seri
     """
     if statement_id not in df_wide.index:
         raise ValueError(f"Statement '{statement_id}' not found in data")
-    
-    # Get all columns except statement_text
-    parties = [col for col in df_wide.columns if col != 'statement_text']
-    return df_wide.loc[statement_id, parties]
+
+    # Use the column positions cached at load time; fall back to deriving
+    # them for frames that did not come from load_statements_wide
+    party_iloc = df_wide.attrs.get('party_iloc')
+    if party_iloc is None:
+        parties = [col for col in df_wide.columns if col != 'statement_text']
+        party_iloc = np.array([df_wide.columns.get_loc(p) for p in parties])
+
+    return df_wide.iloc[df_wide.index.get_loc(statement_id), party_iloc]
 
 
 def calculate_agreement_matrix(df_wide: pd.DataFrame) -> pd.DataFrame:
@@ -153,20 +221,24 @@ def calculate_agreement_matrix(df_wide: pd.DataFrame) -> pd.DataFrame:
         DataFrame with parties as both rows and columns, values are agreement percentages
     """
     parties = [col for col in df_wide.columns if col != 'statement_text']
-    
-    # Create empty matrix
-    agreement_matrix = pd.DataFrame(index=parties, columns=parties, dtype=float)
-    
-    # Calculate pairwise agreements
-    for p1 in parties:
-        for p2 in parties:
-            if p1 == p2:
-                agreement_matrix.loc[p1, p2] = 100.0
-            else:
-                stats = get_party_agreement(df_wide, p1, p2)
-                agreement_matrix.loc[p1, p2] = stats['agreement_rate']
-    
-    return agreement_matrix
+
+    # Stance matrix of shape (statements, parties); mask out missing cells so
+    # two STANCE_NA values never count as an agreement
+    arr = df_wide[parties].to_numpy()
+    valid = arr != STANCE_NA
+
+    # Pairwise equality via broadcasting: one C-level kernel instead of a
+    # Python loop over all party pairs
+    agree_counts = ((arr[:, :, None] == arr[:, None, :])
+                    & (valid[:, :, None] & valid[:, None, :])).sum(axis=0)
+
+    total = len(df_wide)
+    rates = np.round(agree_counts / total * 100, 2) if total > 0 else np.zeros_like(agree_counts, dtype=float)
+
+    # Parties always fully agree with themselves, even on unanswered statements
+    np.fill_diagonal(rates, 100.0)
+
+    return pd.DataFrame(rates, index=parties, columns=parties, dtype=float)
 
 
 if __name__ == "__main__":
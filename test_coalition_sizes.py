@@ -8,27 +8,46 @@ Test coalition size generation
 """
 import asyncio
 from playwright.async_api import async_playwright
-import http.server
-import socketserver
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import json
+import socket
 import threading
 import time
 import re
 
-PORT = 8002
+# Compiled once; matched against every console message below
+_TOP_RE = re.compile(r'\d+\. \[\d+ parties\]')
+_SIZE_RE = re.compile(r'\[(\d+) parties\]')
 
 def start_server():
-    """Start a simple HTTP server in a background thread"""
-    Handler = http.server.SimpleHTTPRequestHandler
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
-        httpd.serve_forever()
+    """Start an HTTP server in a background thread and return its port.
+
+    ThreadingHTTPServer handles concurrent requests, so parallel pages don't
+    serialize on it; binding port 0 lets the OS pick a free port, so
+    concurrent suite runs can't collide on a hard-coded one.
+    """
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SimpleHTTPRequestHandler)
+    port = httpd.server_address[1]
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return port
+
+async def wait_for_server(port, timeout=5.0):
+    """Return as soon as the server accepts connections instead of sleeping"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError(f"HTTP server on port {port} did not come up")
 
 async def test_coalition_sizes():
     """Test that coalitions of all sizes are generated"""
-    # Start server in background thread
-    server_thread = threading.Thread(target=start_server, daemon=True)
-    server_thread.start()
-    time.sleep(2)
-    
+    # Start server in background thread on an OS-assigned port
+    port = start_server()
+    await wait_for_server(port)
+
     console_messages = []
     
     async with async_playwright() as p:
@@ -40,7 +59,7 @@ async def test_coalition_sizes():
         page.on("console", lambda msg: console_messages.append(msg.text))
         
         print("\n🔍 Testing coalition size generation...")
-        await page.goto(f'http://localhost:{PORT}/index.html')
+        await page.goto(f'http://localhost:{port}/index.html')
         await page.wait_for_load_state('networkidle')
         await page.wait_for_timeout(3000)
         
@@ -60,16 +79,12 @@ async def test_coalition_sizes():
     top_coalitions = []
     
     for msg in console_messages:
-        if 'Coalition size distribution:' in msg:
-            # Extract size distribution
-            match = re.search(r'Coalition size distribution: ({.*})', msg)
-            if match:
-                size_dist = eval(match.group(1))
-        elif 'Total coalitions generated:' in msg:
-            match = re.search(r'Total coalitions generated: (\d+)', msg)
-            if match:
-                total_coalitions = int(match.group(1))
-        elif re.match(r'\d+\. \[\d+ parties\]', msg):
+        if msg.startswith('COALITION_STATS:'):
+            # app.js emits this as JSON; no regex or eval needed
+            stats = json.loads(msg[len('COALITION_STATS:'):])
+            size_dist = {int(size): count for size, count in stats['size_distribution'].items()}
+            total_coalitions = stats['total']
+        elif _TOP_RE.match(msg):
             top_coalitions.append(msg)
     
     if size_dist:
@@ -102,7 +117,7 @@ async def test_coalition_sizes():
         
         # Check if top results are all same size
         if top_coalitions:
-            top_sizes = [int(re.search(r'\[(\d+) parties\]', c).group(1)) for c in top_coalitions[:5]]
+            top_sizes = [int(_SIZE_RE.search(c).group(1)) for c in top_coalitions[:5]]
             unique_top_sizes = set(top_sizes)
             if len(unique_top_sizes) == 1:
                 print(f"\n⚠️  WARNING: Top 5 results are ALL {top_sizes[0]}-party coalitions!")
@@ -3,30 +3,57 @@
 Update party seats from NOS VoteFlow API official results.
 """
 
-import json
+import ijson
+import orjson
+import os
+from dataclasses import dataclass
 from datetime import datetime
+from operator import itemgetter
 
-# Read NOS data
-with open('nos_national_results.json', 'r') as f:
-    nos_data = json.load(f)
-
-# Extract party seats from NOS data
-parties = []
-for party_data in nos_data['partijen']:
-    party_name = party_data['partij']['short_name']
-    seats = party_data['huidig']['zetels']
-    votes = party_data['huidig']['stemmen']
-    
-    # Only include parties with seats
-    if seats > 0:
-        parties.append({
-            'party': party_name,
-            'seats': seats,
-            'votes': votes
-        })
-
-# Sort by seats (descending), then by votes (descending)
-parties.sort(key=lambda x: (-x['seats'], -x['votes']))
+# C-level field extractors, built once; cheaper than repeated d['key']
+# lookups in the per-party loop
+_get_short = itemgetter('short_name')
+_get_seats = itemgetter('zetels')
+_get_votes = itemgetter('stemmen')
+
+
+@dataclass(slots=True)
+class PartyRow:
+    """One party in the output; orjson serializes dataclasses directly."""
+    party: str
+    seats: int
+    votes: int
+
+# Stream the party records instead of json.load-ing the whole document;
+# only partijen[*] and a few top-level scalars are ever used. Parties with
+# seats become (-seats, -votes, name) tuples: negation makes plain sort()
+# give the descending order, with no key function and no per-row dict for
+# parties that get filtered out anyway.
+rows = []
+with open('nos_national_results.json', 'rb', buffering=1 << 20) as f:
+    for party_data in ijson.items(f, 'partijen.item', use_float=True):
+        huidig = party_data['huidig']
+        seats = _get_seats(huidig)
+        if seats > 0:
+            rows.append((-seats, -_get_votes(huidig), _get_short(party_data['partij'])))
+
+rows.sort()
+parties = [PartyRow(name, -s, -v) for s, v, name in rows]
+
+# Second streaming pass for the metadata scalars; the (much larger)
+# partijen subtree goes by as parse events without building anything
+_META_KEYS = frozenset({
+    'publicatie_datum_tijd',
+    'aantal_uitslagen',
+    'huidige_verkiezing.kiesgerechtigden',
+    'huidige_verkiezing.opkomst',
+    'huidige_verkiezing.opkomst_promillage',
+})
+meta = {}
+with open('nos_national_results.json', 'rb', buffering=1 << 20) as f:
+    for prefix, _event, value in ijson.parse(f, use_float=True):
+        if prefix in _META_KEYS:
+            meta[prefix] = value
 
 # Create output structure
 output = {
@@ -35,22 +62,28 @@ output = {
         'source_url': 'https://voteflow.api.nos.nl/TK25/index.json',
         'election': 'Tweede Kamer 2025',
         'date': '2025-10-30',
-        'publication_datetime': nos_data['publicatie_datum_tijd'],
-        'municipalities_counted': nos_data['aantal_uitslagen'],
+        'publication_datetime': meta['publicatie_datum_tijd'],
+        'municipalities_counted': meta['aantal_uitslagen'],
         'total_municipalities': 342,
-        'status': 'Eindstand' if nos_data['aantal_uitslagen'] == 342 else 'Tussenstand',
-        'eligible_voters': nos_data['huidige_verkiezing']['kiesgerechtigden'],
-        'turnout': nos_data['huidige_verkiezing']['opkomst'],
-        'turnout_percentage': nos_data['huidige_verkiezing']['opkomst_promillage'] / 10,
+        'status': 'Eindstand' if meta['aantal_uitslagen'] == 342 else 'Tussenstand',
+        'eligible_voters': meta['huidige_verkiezing.kiesgerechtigden'],
+        'turnout': meta['huidige_verkiezing.opkomst'],
+        'turnout_percentage': meta['huidige_verkiezing.opkomst_promillage'] / 10,
         'total_seats': 150,
         'notes': 'Official final results from NOS VoteFlow API. D66 and PVV tied at 26 seats each.'
     },
     'parties': parties
 }
 
-# Write to file
-with open('party_seats_exitpoll_2025.json', 'w') as f:
-    json.dump(output, f, indent=2, ensure_ascii=False)
+# Write to file: orjson encodes straight to UTF-8 bytes in C, and the
+# buffer goes out through a bare fd in a single write syscall, with no
+# buffered-IO layer in between
+buf = orjson.dumps(output, option=orjson.OPT_INDENT_2)
+fd = os.open('party_seats_exitpoll_2025.json', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+try:
+    os.write(fd, buf)
+finally:
+    os.close(fd)
 
 print(f"✓ Updated party_seats_exitpoll_2025.json with official NOS results")
 print(f"  Status: {output['metadata']['status']}")
@@ -59,4 +92,4 @@ print(f"  Turnout: {output['metadata']['turnout_percentage']:.1f}%")
 print(f"  Parties with seats: {len(parties)}")
 print(f"\nTop 5 parties:")
 for i, party in enumerate(parties[:5], 1):
-    print(f"  {i}. {party['party']}: {party['seats']} seats ({party['votes']:,} votes)")
\ No newline at end of file
+    print(f"  {i}. {party.party}: {party.seats} seats ({party.votes:,} votes)")
\ No newline at end of file